@@ -11,16 +11,22 @@
 # -----------------------------------------------------------------------------
 
 from __future__ import annotations
+import io
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 
 from utils_pgd import (
     read_excel_file,
-    read_csv_file,
+    read_csv_table,
+    INFOR_READ_COLUMNS,
     load_infor_from_many_csv,
     build_report,
     _blank_delay_columns,
     _export_excel_styled,
+    to_csv_bytes,
     today_str_id,
 )
 
@@ -49,20 +55,108 @@ with st.sidebar:
     )
 
 # ---------------------------- Helper (UI) ------------------------------------
+# Kolom berulang (low-cardinality) disimpan sebagai category: filter/compare
+# cukup membandingkan kode integer, bukan objek string Python per baris.
+CATEGORY_COLS = ["Order Status Infor", "PO No.(Full)"]
+
+RESULT_FILTER_COLS = [
+    "Result_Quantity",
+    "Result_FPD",
+    "Result_LPD",
+    "Result_CRD",
+    "Result_PSDD",
+    "Result_PODD",
+    "Result_PD",
+]
+FILTER_COLS = ["Order Status Infor", "PO No.(Full)", *RESULT_FILTER_COLS]
+
+
+def _to_categories(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        if col in CATEGORY_COLS or str(col).startswith("Result_"):
+            df[col] = df[col].astype("category")
+    return df
+
+
 def _uniq_vals(df: pd.DataFrame, col: str) -> list[str]:
     if col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            return sorted(df[col].cat.categories.astype(str).tolist())
         vals = df[col].dropna().astype(str).unique().tolist()
         return sorted(vals)
     return []
 
+# ---------------------------- Cache (parse) ----------------------------------
+# Streamlit menjalankan ulang script setiap interaksi widget; parsing file
+# di-cache berdasarkan isi bytes upload agar hanya terjadi sekali per file.
+# cache_resource mengembalikan objek yang sama tanpa pickle/unpickle per rerun,
+# jadi DataFrame hasil cache bersifat read-only (jangan dimutasi in-place).
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _cached_read_excel(file_bytes: bytes) -> pd.DataFrame:
+    return read_excel_file(io.BytesIO(file_bytes))
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _cached_read_csv(file_bytes: bytes) -> pa.Table:
+    # Arrow Table: digabung via concat_tables, konversi ke pandas sekali saja
+    return read_csv_table(io.BytesIO(file_bytes), columns=INFOR_READ_COLUMNS)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_build_report(
+    sap_bytes: bytes, infor_bytes: tuple[bytes, ...]
+) -> tuple[pd.DataFrame, dict[str, list[str]], dict[str, frozenset[str]]]:
+    """Merge + cleaning + compare; hanya dihitung ulang bila file upload berubah.
+
+    Opsi filter (nilai unik sebagai string, list & frozenset) ikut di-cache agar
+    form & filter tidak membangunnya ulang di setiap rerun.
+    """
+    sap_df = _cached_read_excel(sap_bytes)
+    infor_all = load_infor_from_many_csv([_cached_read_csv(b) for b in infor_bytes])
+    final_df = _to_categories(build_report(sap_df, infor_all))
+    filter_opts = {col: _uniq_vals(final_df, col) for col in FILTER_COLS}
+    filter_opt_sets = {col: frozenset(opts) for col, opts in filter_opts.items()}
+    return final_df, filter_opts, filter_opt_sets
+
+
+_EXPORT_CACHE_MAX = 4
+
+
+def _export_bytes(df_export: pd.DataFrame) -> tuple[bytes, bytes]:
+    """XLSX (styled) + CSV bytes, di-memo per isi DataFrame di session_state.
+
+    Execute dengan hasil filter yang sama memakai bytes sebelumnya; kunci =
+    hash isi (xxhash level C) + nama kolom, LRU kecil agar memori terbatas.
+    """
+    key = (
+        tuple(map(str, df_export.columns)),
+        len(df_export),
+        int(pd.util.hash_pandas_object(df_export, index=False).sum()),
+    )
+    cache: dict = st.session_state.setdefault("pgd_comp_export_cache", {})
+    if key in cache:
+        cache[key] = cache.pop(key)  # tandai terbaru
+        return cache[key]
+    out = (
+        _export_excel_styled(df_export, sheet_name="Report").getvalue(),
+        to_csv_bytes(df_export),
+    )
+    cache[key] = out
+    while len(cache) > _EXPORT_CACHE_MAX:
+        cache.pop(next(iter(cache)))
+    return out
+
 # ---------------------------- Main Logic -------------------------------------
 if sap_file and infor_files:
     with st.status("Membaca & menggabungkan file...", expanded=True) as status:
         try:
-            sap_df = read_excel_file(sap_file)
+            sap_bytes = sap_file.getvalue()
+            infor_bytes = tuple(f.getvalue() for f in infor_files)
+
+            sap_df = _cached_read_excel(sap_bytes)
             st.write("SAP dibaca:", sap_df.shape)
 
-            infor_csv_dfs = [read_csv_file(f) for f in infor_files]
+            infor_csv_dfs = [_cached_read_csv(b) for b in infor_bytes]
             infor_all = load_infor_from_many_csv(
                 infor_csv_dfs,
                 on_info=lambda m: st.success(m),
@@ -74,7 +168,7 @@ if sap_file and infor_files:
                 status.update(label="Gagal: tidak ada CSV Infor yang valid.", state="error")
             else:
                 status.update(label="Sukses membaca semua file. Lanjut proses...", state="running")
-                final_df = build_report(sap_df, infor_all)
+                final_df, filter_opts, filter_opt_sets = _cached_build_report(sap_bytes, infor_bytes)
 
                 if final_df.empty:
                     status.update(label="Gagal membuat report — periksa kolom wajib.", state="error")
@@ -84,27 +178,18 @@ if sap_file and infor_files:
                     # -------------------- Sidebar: Filters + Mode --------------
                     with st.sidebar.form("pgd_comp_filters_form"):
                         st.header("🔎 Filters & Mode")
-                        status_opts = _uniq_vals(final_df, "Order Status Infor")
+                        status_opts = filter_opts["Order Status Infor"]
                         selected_status = st.multiselect(
                             "Order Status Infor", options=status_opts, default=status_opts, key="pgd_comp_status"
                         )
-                        po_opts = _uniq_vals(final_df, "PO No.(Full)")
+                        po_opts = filter_opts["PO No.(Full)"]
                         selected_pos = st.multiselect(
                             "PO No.(Full)", options=po_opts, placeholder="Pilih PO (opsional)", key="pgd_comp_po"
                         )
 
-                        result_cols = [
-                            "Result_Quantity",
-                            "Result_FPD",
-                            "Result_LPD",
-                            "Result_CRD",
-                            "Result_PSDD",
-                            "Result_PODD",
-                            "Result_PD",
-                        ]
                         result_selections: dict[str, list[str]] = {}
-                        for col in result_cols:
-                            opts = _uniq_vals(final_df, col)
+                        for col in RESULT_FILTER_COLS:
+                            opts = filter_opts[col]
                             if opts:
                                 result_selections[col] = st.multiselect(
                                     col, options=opts, default=opts, key=f"pgd_comp_{col}"
@@ -131,18 +216,32 @@ if sap_file and infor_files:
                         result_selections = st.session_state.get("pgd_comp_result_selections", {})
                         mode = st.session_state.get("pgd_comp_mode_val", "Semua Kolom")
 
-                        df_view = final_df.copy()
-                        if selected_status:
-                            df_view = df_view[df_view["Order Status Infor"].astype(str).isin(selected_status)]
-                        if selected_pos:
-                            df_view = df_view[df_view["PO No.(Full)"].astype(str).isin(selected_pos)]
-                        for col, sel in result_selections.items():
-                            base_opts = _uniq_vals(final_df, col)
-                            if sel and set(sel) != set(base_opts):
-                                df_view = df_view[df_view[col].astype(str).isin(sel)]
+                        # Filter + serialisasi unduhan hanya saat Execute (atau file
+                        # upload berganti); rerun lain memakai hasil di session_state.
+                        upload_key = (sap_file.file_id, tuple(f.file_id for f in infor_files))
+                        if submitted or st.session_state.get("pgd_comp_upload_key") != upload_key:
+                            # Satu mask gabungan, slicing sekali di akhir; tanpa filter
+                            # aktif final_df dipakai langsung (tanpa copy/slice).
+                            conds = []
+                            if selected_status and frozenset(selected_status) != filter_opt_sets["Order Status Infor"]:
+                                conds.append(final_df["Order Status Infor"].isin(selected_status).to_numpy())
+                            if selected_pos:
+                                conds.append(final_df["PO No.(Full)"].isin(selected_pos).to_numpy())
+                            for col, sel in result_selections.items():
+                                if sel and frozenset(sel) != filter_opt_sets[col]:
+                                    conds.append(final_df[col].isin(sel).to_numpy())
+                            df_view = final_df.loc[np.logical_and.reduce(conds)] if conds else final_df
 
-                        st.session_state["pgd_comp_df_view"] = df_view
-                        st.session_state["pgd_comp_final_df"] = final_df
+                            df_export = _blank_delay_columns(df_view)
+                            st.session_state["pgd_comp_df_view"] = df_view
+                            st.session_state["pgd_comp_final_df"] = final_df
+                            (
+                                st.session_state["pgd_comp_excel_bytes"],
+                                st.session_state["pgd_comp_csv_bytes"],
+                            ) = _export_bytes(df_export)
+                            st.session_state["pgd_comp_upload_key"] = upload_key
+
+                        df_view = st.session_state["pgd_comp_df_view"]
 
                         # -------------------- Preview sesuai mode ----------------
                         st.subheader("🔎 Preview Hasil (After Execute)")
@@ -179,7 +278,7 @@ if sap_file and infor_files:
                                 "Infor PODD",
                                 "Result_PODD",
                             ]
-                            st.dataframe(_subset(df_view, cols_lpd).head(2000), use_container_width=True)
+                            st.dataframe(_subset(df_view.head(2000), cols_lpd), use_container_width=True)
                         elif mode == "Analisis FPD PSDD":
                             cols_fpd_psdd = [
                                 "PO No.(Full)",
@@ -200,7 +299,7 @@ if sap_file and infor_files:
                                 "Infor PSDD",
                                 "Result_PSDD",
                             ]
-                            st.dataframe(_subset(df_view, cols_fpd_psdd).head(2000), use_container_width=True)
+                            st.dataframe(_subset(df_view.head(2000), cols_fpd_psdd), use_container_width=True)
 
                         # -------------------- Summary TRUE/FALSE -----------------
                         st.subheader("📊 Comparison Summary (TRUE vs FALSE)")
@@ -218,9 +317,16 @@ if sap_file and infor_files:
                             if c in df_view.columns
                         ]
                         if existing_results:
-                            true_counts = [int(df_view[c].eq("TRUE").sum()) for c in existing_results]
-                            false_counts = [int(df_view[c].eq("FALSE").sum()) for c in existing_results]
-                            totals = [int(df_view[c].isin(["TRUE", "FALSE"]).sum()) for c in existing_results]
+                            # satu value_counts per kolom → TRUE, FALSE & total sekaligus
+                            counts = (
+                                pd.DataFrame({c: df_view[c].value_counts() for c in existing_results})
+                                .reindex(["TRUE", "FALSE"])
+                                .fillna(0)
+                                .astype(int)
+                            )
+                            true_counts = counts.loc["TRUE"].tolist()
+                            false_counts = counts.loc["FALSE"].tolist()
+                            totals = [t + f for t, f in zip(true_counts, false_counts)]
                             acc = [(t / tot * 100.0) if tot > 0 else 0.0 for t, tot in zip(true_counts, totals)]
 
                             summary_df = pd.DataFrame(
@@ -251,19 +357,16 @@ if sap_file and infor_files:
                         out_name_xlsx = f"PGD Comparison Tracking Report - {today_str_id()}.xlsx"
                         out_name_csv = f"PGD Comparison Tracking Report - {today_str_id()}.csv"
 
-                        df_export = _blank_delay_columns(df_view)
-                        excel_bytes = _export_excel_styled(df_export, sheet_name="Report")
-
                         st.download_button(
                             label="⬇️ Download Excel (Filtered, styled)",
-                            data=excel_bytes,
+                            data=st.session_state["pgd_comp_excel_bytes"],
                             file_name=out_name_xlsx,
                             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                             use_container_width=True,
                         )
                         st.download_button(
                             label="⬇️ Download CSV (Filtered)",
-                            data=df_export.to_csv(index=False).encode("utf-8"),
+                            data=st.session_state["pgd_comp_csv_bytes"],
                             file_name=out_name_csv,
                             mime="text/csv",
                             use_container_width=True,
@@ -11,10 +11,22 @@
 # -----------------------------------------------------------------------------
 
 from __future__ import annotations
+import io
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import streamlit as st
 
-from utils_pgd import read_excel_file, _export_excel_styled
+from utils_pgd import (
+    read_excel_file,
+    _export_excel_styled,
+    to_csv_bytes,
+    _find_col,
+    _is_empty_series,
+    _normalize_so_series,
+)
 
 # --------------------------------- Page Setup --------------------------------
 st.set_page_config(page_title="🕒 Temporary LPD Check", layout="wide")
@@ -30,96 +42,170 @@ with st.sidebar:
     st.header("📤 Upload Files")
     temp_file = st.file_uploader("Temporary Tracking (.xlsx)", type=["xlsx"], key="temp_lpd_file_fixed")
     pgd_file = st.file_uploader("PGD Comparison Report (.xlsx)", type=["xlsx"], key="pgd_report_file_fixed")
+    # aturan trailing zero Temporary (9 digit & berakhir '0' → hapus 1 digit)
+    apply_trailing_zero = st.checkbox("Apply 9-digit trailing-zero rule", value=True)
 
 # ------------------------------- Helpers -------------------------------------
 
-def _normname(s: str) -> str:
-    return (
-        str(s)
-        .strip()
-        .lower()
-        .replace(".", " ")
-        .replace("_", " ")
-        .replace("-", " ")
-    )
+def _preview_table(df: pd.DataFrame) -> pa.Table:
+    # Arrow Table langsung ke st.dataframe (kolom categorical/int jadi buffer tetap);
+    # kolom object campuran angka/teks dijadikan string, seperti perbaikan otomatis Streamlit
+    arrays = []
+    for col in df.columns:
+        try:
+            arrays.append(pa.array(df[col], from_pandas=True))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            arrays.append(pa.array(df[col].astype("string"), from_pandas=True))
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def _as_int64_keys(so: pd.Series) -> pd.Series | None:
+    # digit tanpa leading zero → kunci int64 bila semua SO ≤ 18 digit;
+    # "" dipetakan ke 0 (tetap unik: tidak ada SO ternormalisasi "0")
+    if len(so) and so.str.len().max() > 18:
+        return None
+    return so.replace("", "0").astype("int64")
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _cached_read_excel(file_bytes: bytes, usecols: tuple[str, ...] | None = None) -> pd.DataFrame:
+    """Parse Excel sekali per isi file (di-cache antar rerun Streamlit).
 
+    cache_resource tidak pickle/unpickle di setiap rerun; hasilnya dipakai
+    bersama sehingga pemanggil wajib copy sebelum memutasi.
+    """
+    return read_excel_file(io.BytesIO(file_bytes), usecols=list(usecols) if usecols else None)
 
-def _find_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
-    m = {col: _normname(col) for col in df.columns}
-    for want in candidates:
-        wantn = _normname(want)
-        for col, normed in m.items():
-            if normed == wantn:
-                return col
-    return None
 
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _cached_read_header(file_bytes: bytes) -> list[str]:
+    # probe header (nrows=0) untuk menentukan usecols sebelum parse penuh
+    return list(read_excel_file(io.BytesIO(file_bytes), nrows=0).columns)
 
-def _is_empty_series(s: pd.Series) -> pd.Series:
-    if s is None:
-        return pd.Series([False] * 0)
-    return s.isna() | s.astype(str).str.strip().eq("")
 
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _compute_match(temp_bytes: bytes, pgd_bytes: bytes, apply_trailing_zero: bool = True) -> dict:
+    """Parse + normalisasi SO + matching; dihitung ulang hanya bila isi upload berubah.
 
-def _normalize_so_series(s: pd.Series, *, source: str) -> pd.Series:
-    """Normalisasi SO:
-    - Ambil digit saja, buang leading zero
-    - Khusus source=="temporary": jika panjang 9 dan berakhir '0' → hapus 1 digit trailing
+    Rerun karena widget (mis. pilihan kolom pratinjau) langsung memakai hasil ini.
+    Objek hasil dipakai bersama antar rerun → jangan dimutasi.
     """
-    out = (
-        s.astype(str)
-         .str.replace(r"\D+", "", regex=True)
-         .str.lstrip("0")
+    # Temporary: cukup kolom SO & Remark 2 → probe header lalu baca dengan usecols
+    temp_header = pd.DataFrame(columns=_cached_read_header(temp_bytes))
+    temp_usecols = tuple(
+        c for c in (
+            _find_col(temp_header, ["SO"]),
+            _find_col(temp_header, ["Remark 2", "Remark2", "Remark-2"]),
+        ) if c is not None
+    )
+    # copy dangkal: kolom baru/assign tidak menyentuh DataFrame di cache
+    temp_df = _cached_read_excel(temp_bytes, temp_usecols or None).copy(deep=False)
+    pgd_df = _cached_read_excel(pgd_bytes).copy(deep=False)
+
+    # Kolom penting
+    temp_so_col = _find_col(temp_df, ["SO"]) or "SO"
+    temp_remark2_col = _find_col(temp_df, ["Remark 2", "Remark2", "Remark-2"]) or "Remark 2"
+    pgd_so_col = _find_col(pgd_df, ["SO"]) or "SO"
+    pgd_result_lpd_col = _find_col(pgd_df, ["Result LPD", "Result_LPD", "Result-LPD"]) or "Result_LPD"
+
+    res = {
+        "temp_shape": (temp_df.shape[0], temp_header.shape[1]),
+        "pgd_shape": pgd_df.shape,
+        "pgd_so_col": pgd_so_col,
+        "pgd_result_lpd_col": pgd_result_lpd_col,
+        "error": None,
+    }
+
+    # Validasi
+    miss_temp = [n for n, c in {"SO": temp_so_col, "Remark 2": temp_remark2_col}.items() if c not in temp_df.columns]
+    if miss_temp:
+        res["error"] = "Temporary Tracking: kolom wajib tidak ditemukan: " + ", ".join(miss_temp)
+        return res
+    if pgd_so_col not in pgd_df.columns:
+        res["error"] = "PGD Report: kolom 'SO' tidak ditemukan."
+        return res
+    if pgd_result_lpd_col not in pgd_df.columns:
+        pgd_df[pgd_result_lpd_col] = ""
+
+    # Sisi Temporary dulu (biasanya jauh lebih kecil); PGD hanya dinormalisasi bila ada target
+    temp_so = _normalize_so_series(temp_df[temp_so_col], source="temporary" if apply_trailing_zero else "pgd")
+    temp_keys = _as_int64_keys(temp_so)
+    # Temporary sebagai categorical → duplikat & remark kosong cukup via kode int
+    temp_df["__SO_norm__"] = (temp_so if temp_keys is None else temp_keys).astype("category")
+    so_cats = temp_df["__SO_norm__"].cat.categories
+
+    # SO target: duplikat + remark2 kosong
+    # Histogram per kode SO: jumlah baris & jumlah Remark 2 kosong
+    tmp_rem2_empty = _is_empty_series(temp_df[temp_remark2_col])
+    so_codes = temp_df["__SO_norm__"].cat.codes.to_numpy()
+    so_rows = np.bincount(so_codes, minlength=len(so_cats))
+    so_empty = np.bincount(so_codes[tmp_rem2_empty.to_numpy()], minlength=len(so_cats))
+    is_target = (so_rows > 1) & (so_empty > 0)
+    target_vals = so_cats[is_target]
+
+    if len(target_vals) == 0:
+        # tidak ada target → PGD tidak berubah, normalisasi & matching dilewati
+        match_mask = np.zeros(len(pgd_df), dtype=bool)
+        before_changed = np.empty(0, dtype=object)
+    else:
+        pgd_so = _normalize_so_series(pgd_df[pgd_so_col], source="pgd")
+        pgd_keys = _as_int64_keys(pgd_so) if temp_keys is not None else None
+        if pgd_keys is not None:
+            pgd_so = pgd_keys
+        elif temp_keys is not None:
+            # PGD punya SO > 18 digit → target kembali ke bentuk string ("" ↔ 0)
+            target_vals = target_vals.astype(str).where(target_vals != 0, "")
+        pgd_df["__SO_norm__"] = pgd_so
+
+        # Terapkan ke PGD: hash-set Arrow (C++) dari SO target, probe sekali per baris PGD
+        pgd_arr = pa.array(pgd_so.to_numpy())
+        so_target = pa.array(target_vals.to_numpy(), type=pgd_arr.type)
+        match_mask = pc.is_in(pgd_arr, value_set=so_target).to_numpy(zero_copy_only=False)
+        before_vals = pgd_df[pgd_result_lpd_col].to_numpy(dtype=object)
+        # nilai "before" hanya disimpan untuk baris yang berubah (urutan = urutan baris)
+        before_changed = before_vals[match_mask]
+        pgd_df[pgd_result_lpd_col] = np.where(match_mask, "TEMP", before_vals)
+
+    res.update(
+        pgd_df=pgd_df,
+        before_changed=before_changed,
+        match_mask=match_mask,
+        n_target=len(target_vals),
     )
-    if source == "temporary":
-        out = out.where(~((out.str.len() == 9) & out.str.endswith("0")), out.str[:-1])
-    return out
+    return res
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _export_bytes(temp_bytes: bytes, pgd_bytes: bytes, apply_trailing_zero: bool = True) -> tuple[bytes, bytes]:
+    """XLSX (styled) + CSV dari PGD hasil update; dibangun sekali per pasangan upload."""
+    pgd_df = _compute_match(temp_bytes, pgd_bytes, apply_trailing_zero)["pgd_df"]
+    cleaned = pgd_df.drop(columns=[c for c in pgd_df.columns if c.startswith("__")], errors="ignore")
+    return _export_excel_styled(cleaned, sheet_name="Report").getvalue(), to_csv_bytes(cleaned)
 
 # --------------------------------- Main --------------------------------------
 if temp_file and pgd_file:
     try:
-        temp_df = read_excel_file(temp_file)
-        pgd_df = read_excel_file(pgd_file)
-        st.success(f"Temporary Tracking dibaca: {temp_df.shape[0]} baris, {temp_df.shape[1]} kolom")
-        st.success(f"PGD Report dibaca: {pgd_df.shape[0]} baris, {pgd_df.shape[1]} kolom")
-
-        # Kolom penting
-        temp_so_col = _find_col(temp_df, ["SO"]) or "SO"
-        temp_remark2_col = _find_col(temp_df, ["Remark 2", "Remark2", "Remark-2"]) or "Remark 2"
-        pgd_so_col = _find_col(pgd_df, ["SO"]) or "SO"
-        pgd_result_lpd_col = _find_col(pgd_df, ["Result LPD", "Result_LPD", "Result-LPD"]) or "Result_LPD"
-
-        # Validasi
-        miss_temp = [n for n, c in {"SO": temp_so_col, "Remark 2": temp_remark2_col}.items() if c not in temp_df.columns]
-        if miss_temp:
-            st.error("Temporary Tracking: kolom wajib tidak ditemukan: " + ", ".join(miss_temp))
+        temp_bytes, pgd_bytes = temp_file.getvalue(), pgd_file.getvalue()
+        res = _compute_match(temp_bytes, pgd_bytes, apply_trailing_zero)
+        st.success(f"Temporary Tracking dibaca: {res['temp_shape'][0]} baris, {res['temp_shape'][1]} kolom")
+        st.success(f"PGD Report dibaca: {res['pgd_shape'][0]} baris, {res['pgd_shape'][1]} kolom")
+        if res["error"]:
+            st.error(res["error"])
             st.stop()
-        if pgd_so_col not in pgd_df.columns:
-            st.error("PGD Report: kolom 'SO' tidak ditemukan.")
-            st.stop()
-        if pgd_result_lpd_col not in pgd_df.columns:
-            pgd_df[pgd_result_lpd_col] = ""
-
-        # Normalisasi SO kedua file
-        temp_df["__SO_norm__"] = _normalize_so_series(temp_df[temp_so_col], source="temporary")
-        pgd_df["__SO_norm__"] = _normalize_so_series(pgd_df[pgd_so_col], source="pgd")
-
-        # SO target: duplikat + remark2 kosong
-        tmp_rem2_empty = _is_empty_series(temp_df[temp_remark2_col])
-        dup_mask = temp_df["__SO_norm__"].duplicated(keep=False)
-        so_target = set(temp_df.loc[dup_mask & tmp_rem2_empty, "__SO_norm__"].unique().tolist())
 
-        # Terapkan ke PGD
-        before = pgd_df[pgd_result_lpd_col].copy()
-        match_mask = pgd_df["__SO_norm__"].isin(so_target)
-        pgd_df.loc[match_mask, pgd_result_lpd_col] = "TEMP"
+        pgd_df = res["pgd_df"]
+        before_changed = res["before_changed"]
+        match_mask = res["match_mask"]
+        pgd_so_col = res["pgd_so_col"]
+        pgd_result_lpd_col = res["pgd_result_lpd_col"]
 
         # Ringkasan
         st.divider()
         st.subheader("📊 Ringkasan Perubahan")
         c1, c2, c3 = st.columns(3)
         c1.metric("Total baris PGD", len(pgd_df))
-        c2.metric("Baris diubah → TEMP", int(match_mask.sum()))
-        c3.metric("SO terpengaruh (unik)", len(so_target))
+        c2.metric("Baris diubah → TEMP", int(np.count_nonzero(match_mask)))
+        c3.metric("SO terpengaruh (unik)", res["n_target"])
 
         # Pratinjau
         st.subheader("🔎 Pratinjau Hasil (baris berubah saja)")
@@ -128,25 +214,25 @@ if temp_file and pgd_file:
             options=[c for c in pgd_df.columns if not c.startswith("__")],
             default=[col for col in ["PO No.(Full)", pgd_so_col, "LPD", "Infor LPD", pgd_result_lpd_col] if col in pgd_df.columns],
         )
-        view_df = pgd_df.loc[match_mask, [c for c in show_cols]]
+        # potong ke 2000 baris dulu, baru ambil kolom & tambah kolom bantu
+        preview_pos = np.flatnonzero(match_mask)[:2000]
+        view_df = pgd_df.iloc[preview_pos][show_cols]
         if pgd_result_lpd_col in view_df.columns:
-            view_df = view_df.copy()
-            view_df["Result_LPD_before"] = before.loc[view_df.index]
-        st.dataframe(view_df.head(2000), use_container_width=True)
+            view_df = view_df.assign(Result_LPD_before=before_changed[: len(preview_pos)])
+        st.dataframe(_preview_table(view_df), use_container_width=True)
 
         # Unduhan
         st.subheader("⬇️ Unduh PGD Report (hasil diperbarui)")
         out_xlsx_name = "PGD_Comparison_Updated_Temporary_LPD.xlsx"
         out_csv_name = "PGD_Comparison_Updated_Temporary_LPD.csv"
 
-        cleaned = pgd_df.drop(columns=[c for c in pgd_df.columns if c.startswith("__")], errors="ignore")
-        xbio = _export_excel_styled(cleaned, sheet_name="Report")
+        xlsx_bytes, csv_bytes = _export_bytes(temp_bytes, pgd_bytes, apply_trailing_zero)
         st.download_button(
-            "Download Excel (styled)", data=xbio, file_name=out_xlsx_name,
+            "Download Excel (styled)", data=xlsx_bytes, file_name=out_xlsx_name,
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", use_container_width=True
         )
         st.download_button(
-            "Download CSV", data=cleaned.to_csv(index=False).encode("utf-8"),
+            "Download CSV", data=csv_bytes,
             file_name=out_csv_name, mime="text/csv", use_container_width=True
         )
 
@@ -0,0 +1,44 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from utils_pgd import INFOR_READ_COLUMNS, _map_codes, make_zip_bytes, read_csv_file, read_csv_table
+
+LATIN1_CSV = "Order #,Model Name\n1,café\n2,naïve\n".encode("latin1")
+
+
+def test_read_csv_table_latin1_fallback():
+    table = read_csv_table(io.BytesIO(LATIN1_CSV))
+    assert table.column("Model Name").to_pylist() == ["café", "naïve"]
+
+
+def test_read_csv_table_latin1_fallback_with_columns():
+    table = read_csv_table(io.BytesIO(LATIN1_CSV), columns=INFOR_READ_COLUMNS)
+    assert table.column("Model Name").to_pylist() == ["café", "naïve"]
+
+
+def test_read_csv_file_latin1_fallback():
+    df = read_csv_file(io.BytesIO(LATIN1_CSV))
+    assert df["Model Name"].tolist() == ["café", "naïve"]
+
+
+def test_map_codes_keeps_values_outside_int64_range():
+    s = pd.Series([1e30, "99999999999999999999", 7, np.inf, "x"], dtype=object)
+    assert _map_codes(s).tolist() == [1e30, "99999999999999999999", "02-0007", np.inf, "x"]
+
+
+def test_make_zip_bytes_honours_compresslevel():
+    chunks = [[f"PO{i % 997:07d}" for i in range(200_000)]]
+    fast = make_zip_bytes(chunks, compresslevel=1).getbuffer().nbytes
+    best = make_zip_bytes(chunks, compresslevel=9).getbuffer().nbytes
+    assert best < fast
+
+
+def test_make_zip_bytes_stores_tiny_entries():
+    with zipfile.ZipFile(make_zip_bytes([["1", "2"], [str(i) for i in range(5000)]])) as zf:
+        tiny, big = zf.infolist()
+        assert tiny.compress_type == zipfile.ZIP_STORED
+        assert big.compress_type == zipfile.ZIP_DEFLATED
+        assert zf.read(tiny.filename) == b"PO\n1\n2\n"
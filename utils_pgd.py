@@ -3,31 +3,41 @@
 # Dipakai oleh:
 #   - pages/PGD_Comparison.py
 #   - pages/PO_Splitter.py
+#   - pages/Temporary_LPD_Check.py
 # Berisi:
 #   • Konstanta styling Excel & preferensi kolom tanggal
-#   • Helper I/O (read_excel_file, read_csv_file)
+#   • Helper I/O (read_excel_file, read_csv_file, read_csv_table)
 #   • Pipeline SAP/Infor: load, process, merge, clean, compare, export
+#   • Helper Temporary LPD: cari kolom, cek kosong, normalisasi SO
 #   • Utility Splitter: parse_input, normalize_items, chunk_list, dsb.
 #   • Semua fungsi bebas-dependensi Streamlit agar mudah di-test.
 # -----------------------------------------------------------------------------
 
 from __future__ import annotations
 
+import csv
 import io
 import re
+import time
 import zipfile
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import numpy as np
 import pandas as pd
-from openpyxl.styles import Alignment, Font, PatternFill
-from openpyxl.utils import get_column_letter
+import pyarrow as pa
+import pyarrow.compute as pc
+import xlsxwriter
+from pandas.tseries.api import guess_datetime_format
+from pyarrow import csv as pacsv
 
 # ================== Warna, Kolom, Format ==================
 INFOR_COLOR = "FFF9F16D"   # kuning lembut (header Infor)
 RESULT_COLOR = "FFC6EFCE"  # hijau lembut (header Result_*)
 OTHER_COLOR = "FFD9D9D9"   # abu-abu muda (header lainnya)
 DATE_FMT = "m/d/yyyy"
+RESULT_CATEGORIES = ["FALSE", "TRUE"]  # urutan = kode hasil compare (0/1)
 
 INFOR_COLUMNS_FIXED = [
     "Order Status Infor", "Infor Quantity", "Infor Model Name", "Infor Article No",
@@ -50,92 +60,208 @@ DATE_COLUMNS_PREF = [
     "Infor FPD", "Infor LPD", "Infor CRD", "Infor PSDD", "Infor PODD", "Infor PD",
 ]
 
+# Pasangan kolom yang dibandingkan: (kolom hasil, kolom SAP, kolom Infor)
+RESULT_PAIRS = [
+    ("Result_Quantity", "Quantity", "Infor Quantity"),
+    ("Result_Model Name", "Model Name", "Infor Model Name"),
+    ("Result_Article No", "Article No", "Infor Article No"),
+    ("Result_Classification Code", "Classification Code", "Infor Classification Code"),
+    ("Result_Delay_CRD", "Delay/Early - Confirmation CRD", "Infor Delay/Early - Confirmation CRD"),
+    ("Result_Delay_PSDD", "Delay - PO PSDD Update", "Infor Delay - PO PSDD Update"),
+    ("Result_Lead Time", "Article Lead time", "Infor Lead time"),
+    ("Result_Country", "Ship-to Country", "Infor Ship-to Country"),
+    ("Result_Sort1", "Ship-to-Sort1", "Infor GPS Country"),
+    ("Result_FPD", "FPD", "Infor FPD"),
+    ("Result_LPD", "LPD", "Infor LPD"),
+    ("Result_CRD", "CRD", "Infor CRD"),
+    ("Result_PSDD", "PSDD", "Infor PSDD"),
+    ("Result_PODD", "PODD", "Infor PODD"),
+    ("Result_PD", "PD", "Infor PD"),
+]
+
+# Kolom CSV Infor: wajib ada (validasi per file) & yang dipakai process_infor
+INFOR_REQUIRED_COLUMNS = [
+    "PO Statistical Delivery Date (PSDD)",
+    "Customer Request Date (CRD)",
+    "Line Aggregator",
+]
+INFOR_SOURCE_COLUMNS = [
+    'Order #','Order Status','Model Name','Article Number','Gps Customer Number',
+    'Country/Region','Customer Request Date (CRD)','Plan Date','PO Statistical Delivery Date (PSDD)',
+    'First Production Date','Last Production Date','PODD','Production Lead Time',
+    'Class Code','Delay - Confirmation','Delay - PO Del Update','Quantity'
+]
+# hanya kolom ini yang di-parse dari CSV Infor (ekspor Infor jauh lebih lebar)
+INFOR_READ_COLUMNS = list(dict.fromkeys(INFOR_REQUIRED_COLUMNS + INFOR_SOURCE_COLUMNS))
+
 # ================== Util: Waktu & I/O ==================
+try:
+    _JAKARTA = ZoneInfo("Asia/Jakarta")
+except ZoneInfoNotFoundError:
+    # tanpa database tz (mis. Windows tanpa paket tzdata): WIB tetap UTC+7
+    _JAKARTA = timezone(timedelta(hours=7), "WIB")
+
+
 def today_str_id() -> str:
     """Tanggal hari ini zona Asia/Jakarta (UTC+7) dalam format YYYYMMDD."""
-    return (datetime.utcnow() + timedelta(hours=7)).strftime("%Y%m%d")
+    return datetime.now(_JAKARTA).strftime("%Y%m%d")
+
+
+def read_excel_file(file, usecols=None, nrows=None):
+    """Baca Excel dengan engine calamine (parser Rust, jauh lebih cepat dari openpyxl).
+
+    usecols/nrows diteruskan ke pd.read_excel; nrows=0 = probe header saja.
+    """
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return pd.read_excel(file, engine="calamine", usecols=usecols, nrows=nrows)
+
 
+def _has_binary(schema: pa.Schema) -> bool:
+    """pyarrow tidak error pada byte yang bukan UTF-8 valid: kolomnya diketik binary.
 
-def read_excel_file(file):
-    """Baca Excel dengan engine openpyxl (kompatibel dengan Streamlit uploader)."""
-    return pd.read_excel(file, engine="openpyxl")
+    Dipakai sebagai tanda gagal decode → coba encoding berikutnya.
+    """
+    return any(pa.types.is_binary(f.type) or pa.types.is_large_binary(f.type) for f in schema)
 
 
 def read_csv_file(file):
-    """Baca CSV dengan fallback encoding umum."""
+    """Baca CSV dengan engine pyarrow (multi-thread) + fallback encoding umum.
+
+    Fallback terakhir memakai engine C bawaan pandas untuk CSV yang tidak
+    bisa di-parse pyarrow (mis. jumlah kolom per baris tidak konsisten).
+    """
     for enc in ("utf-8", "utf-8-sig", "latin1"):
         try:
             file.seek(0)
-            return pd.read_csv(file, encoding=enc)
+            df = pd.read_csv(file, encoding=enc, engine="pyarrow")
         except Exception:
             continue
+        # kolom binary (byte non-UTF-8) muncul sebagai objek bytes → encoding salah
+        if any(pd.api.types.infer_dtype(df[c], skipna=True) == "bytes"
+               for c in df.columns if df[c].dtype == object):
+            continue
+        return df
     file.seek(0)
     return pd.read_csv(file)
 
 
+def read_csv_table(file, columns=None) -> pa.Table:
+    """Baca CSV langsung ke Arrow Table (parser C++ multi-thread) + fallback encoding umum.
+
+    String kosong dibaca sebagai null agar setara dengan NaN pada pd.read_csv.
+    `columns`: hanya kolom ini (yang ada di header) yang di-parse; kolom yang
+    tidak ada tidak ditambahkan, jadi validasi kolom wajib tetap berlaku.
+    Hasil dengan kolom binary (byte non-UTF-8) dianggap gagal decode.
+    """
+    for enc in ("utf-8", "utf-8-sig", "latin1"):
+        try:
+            read_options = pacsv.ReadOptions(encoding=enc)
+            convert_options = pacsv.ConvertOptions(strings_can_be_null=True)
+            if columns is not None:
+                file.seek(0)
+                with pacsv.open_csv(file, read_options=read_options) as reader:
+                    schema = reader.schema
+                if _has_binary(schema):
+                    continue
+                convert_options.include_columns = [c for c in columns if c in schema.names]
+            file.seek(0)
+            table = pacsv.read_csv(file, read_options=read_options, convert_options=convert_options)
+        except Exception:
+            continue
+        if _has_binary(table.schema):
+            continue
+        return table
+    file.seek(0)
+    usecols = None if columns is None else (lambda c: c in columns)
+    return pa.Table.from_pandas(pd.read_csv(file, usecols=usecols), preserve_index=False)
+
+
 # ================== Util: Tanggal ==================
+def _date_format_of(s: pd.Series) -> str | None:
+    """Format tanggal dari nilai string non-null pertama (aturan inferensi pandas)."""
+    first = s.loc[s.first_valid_index()] if s.first_valid_index() is not None else None
+    return guess_datetime_format(first) if isinstance(first, str) else None
+
+
 def convert_date_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """Coerce kolom tanggal yang dikenal menjadi datetime (errors='coerce')."""
+    """Coerce kolom tanggal yang dikenal menjadi datetime (errors='coerce').
+
+    Kolom yang sudah datetime64 dilewati (SAP dikonversi di load_sap). Format
+    ditebak sekali per kolom lalu diberikan eksplisit → jalur strptime C + cache
+    untuk string tanggal yang berulang.
+    """
     for col in DATE_COLUMNS_PREF:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce")
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=_date_format_of(df[col]), errors="coerce", cache=True)
     return df
 
 
 # ================== SAP loaders ==================
+def _po_key(s: pd.Series) -> pd.Series:
+    """Kunci PO untuk join SAP↔Infor: string[pyarrow], di-strip lalu zfill(10); kosong tetap NA."""
+    return s.astype("string[pyarrow]").str.strip().str.zfill(10)
+
+
 def load_sap(sap_df: pd.DataFrame) -> pd.DataFrame:
-    df = sap_df.copy()
+    df = sap_df.copy(deep=False)
     if "Quanity" in df.columns and "Quantity" not in df.columns:
         df.rename(columns={"Quanity": "Quantity"}, inplace=True)
     if "PO No.(Full)" in df.columns:
-        df["PO No.(Full)"] = df["PO No.(Full)"].astype(str).str.strip()
+        df["PO No.(Full)"] = _po_key(df["PO No.(Full)"])
     return convert_date_columns(df)
 
 
 # ================== Infor loaders ==================
 def load_infor_from_many_csv(csv_dfs, *, on_info=lambda msg: None, on_warn=lambda msg: None):
-    """Gabungkan banyak CSV Infor; validasi kolom wajib; log via callback opsional."""
+    """Gabungkan banyak CSV Infor; validasi kolom wajib; log via callback opsional.
+
+    Input boleh DataFrame atau Arrow Table (lihat read_csv_table). Bila semua
+    Arrow Table, penggabungan dilakukan di Arrow (concat_tables, tanpa copy)
+    lalu dikonversi ke pandas sekali saja di akhir. Hanya INFOR_READ_COLUMNS
+    yang dibawa ke hasil.
+    """
     data_list = []
-    required_cols = [
-        "PO Statistical Delivery Date (PSDD)",
-        "Customer Request Date (CRD)",
-        "Line Aggregator",
-    ]
     for i, df in enumerate(csv_dfs, start=1):
-        if all(col in df.columns for col in required_cols):
-            data_list.append(df)
+        cols = df.column_names if isinstance(df, pa.Table) else df.columns
+        if all(col in cols for col in INFOR_REQUIRED_COLUMNS):
+            # buang kolom yang tidak dipakai sebelum concat (Table.select tanpa copy)
+            keep = [c for c in INFOR_READ_COLUMNS if c in cols]
+            data_list.append(df.select(keep) if isinstance(df, pa.Table) else df[keep])
             on_info(f"Dibaca ✅ CSV ke-{i} (kolom wajib lengkap)")
         else:
-            miss = [c for c in required_cols if c not in df.columns]
+            miss = [c for c in INFOR_REQUIRED_COLUMNS if c not in cols]
             on_warn(f"CSV ke-{i} dilewati ⚠️ (kolom wajib hilang: {miss})")
     if not data_list:
         return pd.DataFrame()
-    return pd.concat(data_list, ignore_index=True)
+    if all(isinstance(t, pa.Table) for t in data_list):
+        try:
+            table = pa.concat_tables(data_list, promote_options="permissive")
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # tipe kolom beda antar file (mis. kode delay angka vs teks) → gabung di pandas
+            pass
+        else:
+            return table.to_pandas(coerce_temporal_nanoseconds=True, split_blocks=True)
+    data_list = [
+        t.to_pandas(coerce_temporal_nanoseconds=True) if isinstance(t, pa.Table) else t for t in data_list
+    ]
+    return pd.concat(data_list, ignore_index=True, sort=False, copy=False)
 
 
 # ================== Infor processing & Comparison ==================
 def process_infor(df_all: pd.DataFrame) -> pd.DataFrame:
     """Ambil kolom penting dari Infor, agregasi per Order #, dan rename ke prefiks Infor.*"""
-    selected_columns = [
-        'Order #','Order Status','Model Name','Article Number','Gps Customer Number',
-        'Country/Region','Customer Request Date (CRD)','Plan Date','PO Statistical Delivery Date (PSDD)',
-        'First Production Date','Last Production Date','PODD','Production Lead Time',
-        'Class Code','Delay - Confirmation','Delay - PO Del Update','Quantity'
-    ]
-    missing_cols = [col for col in selected_columns if col not in df_all.columns]
+    missing_cols = [col for col in INFOR_SOURCE_COLUMNS if col not in df_all.columns]
     if missing_cols:
         return pd.DataFrame()
 
-    df_infor = df_all[selected_columns].copy()
-    df_infor = df_infor.groupby('Order #', as_index=False).agg({
-        'Order Status':'first','Model Name':'first','Article Number':'first','Gps Customer Number':'first',
-        'Country/Region':'first','Customer Request Date (CRD)':'first','Plan Date':'first',
-        'PO Statistical Delivery Date (PSDD)':'first','First Production Date':'first',
-        'Last Production Date':'first','PODD':'first','Production Lead Time':'first',
-        'Class Code':'first','Delay - Confirmation':'first','Delay - PO Del Update':'first',
-        'Quantity':'sum'
-    })
-    df_infor["Order #"] = df_infor["Order #"].astype(str).zfill(10).str.strip()
+    # satu groupby (kunci di-hash sekali) dipakai bersama untuk 'first' semua kolom
+    # dan 'sum' Quantity; sort=False karena urutan tidak dipakai oleh merge berikutnya.
+    # 'first' (bukan drop_duplicates) dipertahankan: ia mengambil nilai non-null pertama.
+    # kunci dinormalisasi sebelum groupby → Order # unik, merge bisa validate="m:1"
+    grouped = df_all[INFOR_SOURCE_COLUMNS].groupby(_po_key(df_all['Order #']), sort=False)
+    first_cols = [c for c in INFOR_SOURCE_COLUMNS if c not in ('Order #', 'Quantity')]
+    df_infor = grouped[first_cols].first().join(grouped['Quantity'].sum()).reset_index()
 
     rename_cols = {
         'Order Status':'Order Status Infor','Model Name':'Infor Model Name','Article Number':'Infor Article No',
@@ -151,33 +277,96 @@ def process_infor(df_all: pd.DataFrame) -> pd.DataFrame:
 
 
 def merge_sap_infor(df_sap: pd.DataFrame, df_infor: pd.DataFrame) -> pd.DataFrame:
-    sap = df_sap.copy()
-    inf = df_infor.copy()
-    if 'PO No.(Full)' in sap.columns:
-        sap['PO No.(Full)'] = sap['PO No.(Full)'].astype(str).str.zfill(10)
-    if 'Order #' in inf.columns:
-        inf['Order #'] = inf['Order #'].astype(str).str.zfill(10)
-    return sap.merge(inf, how='left', left_on='PO No.(Full)', right_on='Order #')
+    """Left join SAP → Infor; kunci sudah dinormalisasi _po_key di load_sap/process_infor."""
+    return df_sap.merge(
+        df_infor, how='left', left_on='PO No.(Full)', right_on='Order #', validate='m:1', sort=False
+    )
 
 
 def fill_missing_dates(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
+    # shallow copy: kolom hanya diganti (bukan ditulis in-place) → input pemanggil aman
+    out = df.copy(deep=False)
     out['Order Status Infor'] = out.get('Order Status Infor', pd.Series(dtype=str)).astype(str).str.strip().str.upper()
     for col in ['LPD','FPD','CRD','PD','PSDD','PODD']:
         if col not in out.columns:
             out[col] = pd.NaT
         out[col] = pd.to_datetime(out[col], errors='coerce')
-    mask_open = out['Order Status Infor'].eq('OPEN')
-    min_dates = out[['CRD','PD']].min(axis=1)
-    out.loc[mask_open & out['LPD'].isna(),'LPD'] = min_dates
-    out.loc[mask_open & out['FPD'].isna(),'FPD'] = min_dates
-    out.loc[mask_open & out['PSDD'].isna(),'PSDD'] = out['CRD']
-    out.loc[mask_open & out['PODD'].isna(),'PODD'] = out['CRD']
+    # langsung di array datetime64: fmin = min yang melewati NaT (setara min(axis=1))
+    mask_open = out['Order Status Infor'].to_numpy() == 'OPEN'
+    crd = out['CRD'].to_numpy('datetime64[ns]')
+    min_dates = np.fmin(crd, out['PD'].to_numpy('datetime64[ns]'))
+    for col, fill in (('LPD', min_dates), ('FPD', min_dates), ('PSDD', crd), ('PODD', crd)):
+        vals = out[col].to_numpy('datetime64[ns]')
+        out[col] = np.where(mask_open & np.isnat(vals), fill, vals)
     return out
 
 
+DELAY_CODE_MAPPING = {
+    '161':'01-0161','84':'03-0084','68':'02-0068','64':'04-0064','62':'02-0062','61':'01-0061',
+    '51':'03-0051','46':'03-0046','7':'02-0007','3':'03-0003','2':'01-0002','1':'01-0001',
+    '4':'04-0004','8':'02-0008','10':'04-0010','49':'03-0049','90':'04-0090','63':'03-0063'
+}
+
+
+def _map_codes(s: pd.Series) -> pd.Series:
+    """Kode delay numerik → kode lengkap (mis. 7 → '02-0007'); nilai lain dibiarkan.
+
+    Setara str(int(float(x))) per sel, tapi vektor: to_numeric → trunc → Int64 → map.
+    """
+    num = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    # inf / di luar rentang int64 tidak bisa di-cast ke Int64 → NaN (nilai asli dipertahankan)
+    num = np.where(np.isfinite(num) & (np.abs(num) < 2.0**63), num, np.nan)
+    key = pd.Series(np.trunc(num), index=s.index).astype("Int64").astype(str)
+    mapped = key.map(DELAY_CODE_MAPPING)
+    return mapped.where(mapped.notna(), s)
+
+
+def _strip_float_zero(x: pd.Series) -> pd.Series | None:
+    """Float bulat (12.0) → '12' lewat cast int64 numpy, tanpa str() + replace('.0') per nilai.
+
+    Hanya bila hasilnya pasti sama dengan str(x).replace('.0', ''): semua nilai
+    finite, bulat, |x| < 1e16 (di atas itu repr memakai notasi e) dan bukan -0.0.
+    Selain itu None → jalur string biasa.
+    """
+    if x.dtype.kind != "f":
+        return None
+    v = x.to_numpy()
+    if not (np.isfinite(v).all() and (np.abs(v) < 1e16).all() and (v == np.trunc(v)).all()):
+        return None
+    if (np.signbit(v) & (v == 0)).any():
+        return None
+    return pd.Series(v.astype(np.int64).astype(str), index=x.index)
+
+
+def _normalize_str_column(s: pd.Series, *, drop_dot_zero: bool = False) -> pd.Series:
+    """astype(str) → strip → upper (→ hapus ".0"), dikerjakan per nilai unik saja.
+
+    Nilai unik dinormalisasi lalu disebar ke baris via kode factorize; baris NA
+    (NaN/None/<NA> punya str berbeda) diproses terpisah. Kolom object campuran
+    (angka + teks) di-str() dulu per baris (factorize menyamakan 1 dan 1.0),
+    strip/upper tetap hanya per nilai unik.
+    """
+    def _norm(x: pd.Series) -> pd.Series:
+        if drop_dot_zero:
+            ints = _strip_float_zero(x)
+            if ints is not None:
+                return ints
+        out = x.astype(str).str.strip().str.upper()
+        return out.str.replace(".0", "", regex=False) if drop_dot_zero else out
+
+    if s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty"):
+        s = s.astype(str)
+    codes, uniques = pd.factorize(s)
+    na = codes < 0
+    values = np.empty(len(s), dtype=object)
+    values[~na] = _norm(pd.Series(uniques)).to_numpy(dtype=object)[codes[~na]]
+    if na.any():
+        values[na] = _norm(s[na]).to_numpy(dtype=object)
+    return pd.Series(values, index=s.index)
+
+
 def clean_and_compare(df_merged: pd.DataFrame) -> pd.DataFrame:
-    df = df_merged.copy()
+    df = df_merged.copy(deep=False)
 
     # numerik
     for col in ["Quantity","Infor Quantity","Production Lead Time","Infor Lead time","Article Lead time"]:
@@ -185,25 +374,9 @@ def clean_and_compare(df_merged: pd.DataFrame) -> pd.DataFrame:
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).round(2)
 
     # mapping delay codes
-    code_mapping = {
-        '161':'01-0161','84':'03-0084','68':'02-0068','64':'04-0064','62':'02-0062','61':'01-0061',
-        '51':'03-0051','46':'03-0046','7':'02-0007','3':'03-0003','2':'01-0002','1':'01-0001',
-        '4':'04-0004','8':'02-0008','10':'04-0010','49':'03-0049','90':'04-0090','63':'03-0063'
-    }
-    def map_code_safely(x):
-        try:
-            return code_mapping.get(str(int(float(x))), x)
-        except (ValueError, TypeError):
-            return x
-
-    if "Infor Delay/Early - Confirmation CRD" in df.columns:
-        df["Infor Delay/Early - Confirmation CRD"] = (
-            df["Infor Delay/Early - Confirmation CRD"].replace(['--','N/A','NULL'], pd.NA).apply(map_code_safely)
-        )
-    if "Infor Delay - PO PSDD Update" in df.columns:
-        df["Infor Delay - PO PSDD Update"] = (
-            df["Infor Delay - PO PSDD Update"].replace(['--','N/A','NULL'], pd.NA).apply(map_code_safely)
-        )
+    for col in ("Infor Delay/Early - Confirmation CRD", "Infor Delay - PO PSDD Update"):
+        if col in df.columns:
+            df[col] = _map_codes(df[col].replace(['--','N/A','NULL'], pd.NA))
 
     # normalisasi string
     string_cols = [
@@ -216,33 +389,20 @@ def clean_and_compare(df_merged: pd.DataFrame) -> pd.DataFrame:
     ]
     for col in string_cols:
         if col in df.columns:
-            df[col] = df[col].astype(str).str.strip().str.upper()
-    if "Ship-to-Sort1" in df.columns:
-        df["Ship-to-Sort1"] = df["Ship-to-Sort1"].astype(str).str.replace(".0","", regex=False)
-    if "Infor GPS Country" in df.columns:
-        df["Infor GPS Country"] = df["Infor GPS Country"].astype(str).str.replace(".0","", regex=False)
-
-    # hasil perbandingan
-    def safe_result(c1, c2):
+            df[col] = _normalize_str_column(df[col], drop_dot_zero=col in ("Ship-to-Sort1", "Infor GPS Country"))
+
+    # hasil perbandingan: categorical kode int8 (0=FALSE, 1=TRUE) langsung dari mask,
+    # tanpa array object string; value_counts/filter berjalan di atas kode.
+    # Semua kolom Result_* dibangun dulu lalu dipasang sekali (bukan 15x insert).
+    missing = ["COLUMN MISSING"] * len(df)
+    results = {}
+    for name, c1, c2 in RESULT_PAIRS:
         if c1 in df.columns and c2 in df.columns:
-            return np.where(df[c1] == df[c2], "TRUE", "FALSE")
-        return ["COLUMN MISSING"] * len(df)
-
-    df["Result_Quantity"]            = safe_result("Quantity","Infor Quantity")
-    df["Result_Model Name"]          = safe_result("Model Name","Infor Model Name")
-    df["Result_Article No"]          = safe_result("Article No","Infor Article No")
-    df["Result_Classification Code"] = safe_result("Classification Code","Infor Classification Code")
-    df["Result_Delay_CRD"]           = safe_result("Delay/Early - Confirmation CRD","Infor Delay/Early - Confirmation CRD")
-    df["Result_Delay_PSDD"]          = safe_result("Delay - PO PSDD Update","Infor Delay - PO PSDD Update")
-    df["Result_Lead Time"]           = safe_result("Article Lead time","Infor Lead time")
-    df["Result_Country"]             = safe_result("Ship-to Country","Infor Ship-to Country")
-    df["Result_Sort1"]               = safe_result("Ship-to-Sort1","Infor GPS Country")
-    df["Result_FPD"]                 = safe_result("FPD","Infor FPD")
-    df["Result_LPD"]                 = safe_result("LPD","Infor LPD")
-    df["Result_CRD"]                 = safe_result("CRD","Infor CRD")
-    df["Result_PSDD"]                = safe_result("PSDD","Infor PSDD")
-    df["Result_PODD"]                = safe_result("PODD","Infor PODD")
-    df["Result_PD"]                  = safe_result("PD","Infor PD")
+            eq = (df[c1] == df[c2]).to_numpy(dtype=np.int8)
+            results[name] = pd.Categorical.from_codes(eq, categories=RESULT_CATEGORIES)
+        else:
+            results[name] = missing
+    df = df.assign(**results)
 
     return df
 
@@ -287,7 +447,7 @@ def build_report(df_sap: pd.DataFrame, df_infor_raw: pd.DataFrame) -> pd.DataFra
 
 # ================== Export Styled Excel ==================
 def _blank_delay_columns(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
+    out = df.copy(deep=False)
     for col in DELAY_EMPTY_COLUMNS:
         if col in out.columns:
             out[col] = out[col].replace({
@@ -297,67 +457,217 @@ def _blank_delay_columns(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+_EXPORT_CHUNK_ROWS = 20_000
+# klasifikasi header/kolom tanggal: lookup set, bukan scan list per kolom
+_INFOR_COLUMNS_SET = frozenset(INFOR_COLUMNS_FIXED)
+_DATE_COLUMNS_SET = frozenset(DATE_COLUMNS_PREF)
+
+
+def _export_col_width(s: pd.Series, header) -> int:
+    """Lebar kolom dari isi DataFrame (mode streaming tidak bisa membaca balik sel).
+
+    Panjang teks dihitung dari nilai unik saja (kategori yang terpakai untuk
+    categorical), bukan str() per baris.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        vals = pd.Series(s.cat.categories[np.unique(codes[codes >= 0])])
+    else:
+        vals = s.dropna()
+    if vals.empty:
+        maxlen = 0
+    elif pd.api.types.is_datetime64_any_dtype(vals):
+        maxlen = len("yyyy-mm-dd hh:mm:ss")
+    else:
+        maxlen = int(pd.Series(pd.unique(vals)).astype(str).str.len().max())
+    return min(max(9, max(maxlen, len(str(header))) + 2), 40)
+
+
+def _excel_serial(s: pd.Series) -> np.ndarray:
+    """datetime64 → serial tanggal Excel (epoch 1900, sama dengan xlsxwriter); NaT → None."""
+    delta = s - pd.Timestamp(1899, 12, 31)
+    days = delta.dt.days.to_numpy(dtype=float, na_value=np.nan)
+    secs = delta.dt.seconds.to_numpy(dtype=float, na_value=np.nan)
+    micros = delta.dt.microseconds.to_numpy(dtype=float, na_value=np.nan)
+    serial = days + (secs + micros / 1e6) / (60 * 60 * 24)
+    # 1900-01-01 diperlakukan xlsxwriter sebagai nilai jam saja (dikurangi 1 hari),
+    # dan bug tahun kabisat 1900 di Excel: serial > 59 digeser 1 hari
+    serial = np.where(days == 1, serial - 1, serial)
+    serial = np.where(serial > 59, serial + 1, serial)
+    out = serial.astype(object)
+    out[np.isnan(serial)] = None
+    return out
+
+
 def _export_excel_styled(df: pd.DataFrame, sheet_name: str = "Report") -> io.BytesIO:
-    """Header diwarnai; body plain; font Calibri 9; tanggal m/d/yyyy; auto width; freeze A2."""
+    """Header diwarnai; body plain; font Calibri 9; tanggal m/d/yyyy; auto width; freeze A2.
+
+    Memakai xlsxwriter constant_memory: tiap baris langsung di-flush ke XML
+    sehingga memori writer tidak tumbuh per sel. Format dibuat sekali per jenis.
+    """
     bio = io.BytesIO()
-    with pd.ExcelWriter(bio, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-        ws = writer.sheets[sheet_name]
-
-        # bersihkan fill
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.fill = PatternFill(fill_type=None)
-
-        # header coloring
-        header_cells = list(ws.iter_rows(min_row=1, max_row=1, values_only=False))[0]
-        idx_by_name = {c.value: i+1 for i, c in enumerate(header_cells)}
-        for cell in header_cells:
-            col_name = str(cell.value)
-            if col_name in INFOR_COLUMNS_FIXED:
-                fill = PatternFill("solid", fgColor=INFOR_COLOR)
-            elif col_name.startswith("Result_"):
-                fill = PatternFill("solid", fgColor=RESULT_COLOR)
-            else:
-                fill = PatternFill("solid", fgColor=OTHER_COLOR)
-            cell.fill = fill
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=False)
-            cell.font = Font(name="Calibri", size=9, bold=True)
-
-        # body style
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.fill = PatternFill(fill_type=None)
-                cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=False)
-                cell.font = Font(name="Calibri", size=9)
-
-        # format tanggal
-        for date_col in DATE_COLUMNS_PREF:
-            if date_col in idx_by_name:
-                cidx = idx_by_name[date_col]
-                for r in range(2, ws.max_row + 1):
-                    cell = ws.cell(row=r, column=cidx)
-                    if cell.value not in ("", None):
-                        cell.number_format = DATE_FMT
-
-        # auto width
-        for col_idx in range(1, ws.max_column + 1):
-            col_letter = get_column_letter(col_idx)
-            maxlen = 0
-            for cell in ws[col_letter]:
-                v = "" if cell.value is None else str(cell.value)
-                maxlen = max(maxlen, len(v))
-            ws.column_dimensions[col_letter].width = min(max(9, maxlen + 2), 40)
-
-        # UX
-        ws.freeze_panes = "A2"
-        ws.auto_filter.ref = ws.dimensions
+    wb = xlsxwriter.Workbook(
+        bio, {"constant_memory": True, "strings_to_formulas": False, "strings_to_urls": False}
+    )
+    ws = wb.add_worksheet(sheet_name)
+    n_cols = len(df.columns)
+
+    # auto width
+    for i in range(n_cols):
+        ws.set_column(i, i, _export_col_width(df.iloc[:, i], df.columns[i]))
+
+    # UX
+    ws.freeze_panes(1, 0)
+    ws.autofilter(0, 0, len(df), max(n_cols, 1) - 1)
+
+    # header coloring
+    base = {"font_name": "Calibri", "font_size": 9, "align": "center", "valign": "vcenter"}
+    header_fmts = {
+        color: wb.add_format({**base, "bold": True, "border": 1, "pattern": 1, "bg_color": "#" + color[2:]})
+        for color in (INFOR_COLOR, RESULT_COLOR, OTHER_COLOR)
+    }
+    for c, col in enumerate(df.columns):
+        col_name = str(col)
+        if col_name in _INFOR_COLUMNS_SET:
+            color = INFOR_COLOR
+        elif col_name.startswith("Result_"):
+            color = RESULT_COLOR
+        else:
+            color = OTHER_COLOR
+        ws.write(0, c, col, header_fmts[color])
+
+    # body style: format per kolom (tanggal → m/d/yyyy bila tidak kosong);
+    # datetime di kolom non-tanggal memakai format datetime bawaan Excel
+    body_fmt = wb.add_format(base)
+    date_fmt = wb.add_format({**base, "num_format": DATE_FMT})
+    datetime_fmt = wb.add_format({**base, "num_format": "yyyy-mm-dd h:mm:ss"})
+    col_date_fmts = [date_fmt if str(col) in _DATE_COLUMNS_SET else datetime_fmt for col in df.columns]
+
+    # writer per kolom dipilih sekali dari dtype (bukan dispatch write() per sel):
+    # datetime64 → serial Excel dihitung vektor lalu write_number + format tanggal,
+    # angka → write_number, teks murni → write_string, sisanya write() generik
+    col_writers = []
+    serial_cols = []
+    for i in range(n_cols):
+        s = df.iloc[:, i]
+        kind = pd.api.types.infer_dtype(s.cat.categories if isinstance(s.dtype, pd.CategoricalDtype) else s, skipna=True)
+        if pd.api.types.is_datetime64_dtype(s):
+            serial_cols.append(i)
+            col_writers.append((ws.write_number, col_date_fmts[i]))
+        elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            col_writers.append((ws.write_number, body_fmt))
+        elif kind == "string":
+            col_writers.append((ws.write_string, body_fmt))
+        else:
+            col_writers.append((None, body_fmt))
+
+    r = 1
+    for start in range(0, len(df), _EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[start:start + _EXPORT_CHUNK_ROWS]
+        part = chunk.astype(object)
+        part = part.where(chunk.notna(), None)
+        for i in serial_cols:
+            part.isetitem(i, _excel_serial(chunk.iloc[:, i]))
+        for values in part.itertuples(index=False, name=None):
+            for c, value in enumerate(values):
+                if value is None or value == "":
+                    ws.write_blank(r, c, None, body_fmt)
+                    continue
+                write, fmt = col_writers[c]
+                if write is not None:
+                    write(r, c, value, fmt)
+                elif isinstance(value, (datetime, date)):
+                    ws.write_datetime(r, c, value, col_date_fmts[c])
+                else:
+                    ws.write(r, c, value, fmt)
+            r += 1
 
+    wb.close()
     bio.seek(0)
     return bio
 
 
+# ================== Temporary LPD Helpers ==================
+_NAME_TRANS = str.maketrans({".": " ", "_": " ", "-": " "})
+
+
+class _DigitsOnly(dict):
+    """Tabel str.translate: simpan digit desimal (setara \\d pada re), hapus sisanya.
+
+    Diisi malas per code point sehingga digit Unicode non-ASCII ikut dikenali.
+    """
+
+    def __missing__(self, code: int):
+        ch = chr(code)
+        keep = ch if ch.isdecimal() else None
+        self[code] = keep
+        return keep
+
+
+_KEEP_DIGITS = _DigitsOnly()
+
+
+@lru_cache(maxsize=1024)
+def _normname(s: str) -> str:
+    return str(s).strip().lower().translate(_NAME_TRANS)
+
+
+@lru_cache(maxsize=32)
+def _norm_col_map(columns: tuple) -> dict:
+    # nama ternormalisasi → kolom pertama (urutan df) yang cocok
+    norm_to_col: dict = {}
+    for col in columns:
+        norm_to_col.setdefault(_normname(col), col)
+    return norm_to_col
+
+
+def _find_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
+    norm_to_col = _norm_col_map(tuple(df.columns))
+    return next((norm_to_col[n] for n in map(_normname, candidates) if n in norm_to_col), None)
+
+
+def _is_empty_series(s: pd.Series) -> pd.Series:
+    if s is None:
+        return pd.Series([False] * 0)
+    # satu kernel Arrow: trim + bandingkan "", null (NaN) dihitung kosong
+    arr = pa.array(s.astype("string[pyarrow]").array)
+    empty = pc.fill_null(pc.equal(pc.utf8_trim_whitespace(arr), ""), True)
+    return pd.Series(empty.to_numpy(zero_copy_only=False), index=s.index)
+
+
+def _normalize_so_series(s: pd.Series, *, source: str) -> pd.Series:
+    """Normalisasi SO:
+    - Ambil digit saja, buang leading zero
+    - Khusus source=="temporary": jika panjang 9 dan berakhir '0' → hapus 1 digit trailing
+    """
+    if pd.api.types.is_integer_dtype(s.dtype) or pd.api.types.infer_dtype(s, skipna=True) == "integer":
+        # fast path: SO murni integer → semua aturan lewat aritmetika, satu cast ke string
+        # (digit = abs(n); 0/NaN → ""; 9 digit & berakhir 0 → n // 10)
+        num = s.astype("Int64").abs()
+        if source == "temporary":
+            num = num.where(~(num.between(100_000_000, 999_999_999) & (num % 10 == 0)), num // 10)
+        return num.mask(num == 0).astype("string[pyarrow]").fillna("")
+
+    # ambil digit hanya pada nilai unik (SO di tracking banyak berulang)
+    # lalu disebar ke baris via kode factorize
+    codes, uniques = pd.factorize(s.astype("string[pyarrow]"))
+    uniq_digits = pd.array([u.translate(_KEEP_DIGITS) for u in uniques.to_numpy()], dtype="string[pyarrow]")
+    digits = pd.Series(uniq_digits.take(codes, allow_fill=True), index=s.index)
+    out = digits.str.lstrip("0").fillna("")
+    if source == "temporary":
+        out = out.where(~((out.str.len() == 9) & out.str.endswith("0")), out.str[:-1])
+    return out
+
+
 # ================== PO Splitter Helpers ==================
+# regex dikompilasi sekali di level modul (bukan per panggilan / per item)
+_WS_RE = re.compile(r"\s+")
+_CRLF_RE = re.compile(r"[\r\n]+")
+_SEMI_RE = re.compile(r"[,;]")
+_STRIP_RE = re.compile(r"^\W+|\W+$")
+_DIGITS_RE = re.compile(r"\D+")
+
+
 def parse_input(text: str, split_mode: str = "auto"):
     text = (text or "").strip()
     if not text:
@@ -369,41 +679,50 @@ def parse_input(text: str, split_mode: str = "auto"):
     elif split_mode == "semicolon":
         raw = text.split(";")
     elif split_mode == "whitespace":
-        raw = re.split(r"\s+", text)
+        raw = _WS_RE.split(text)
     else:
         if "\n" in text:
-            raw = re.split(r"[\r\n]+", text)
+            raw = _CRLF_RE.split(text)
             split_more = []
             for line in raw:
                 s = line.strip()
                 if not s:
                     continue
                 if ("," in s) or (";" in s):
-                    split_more.extend(re.split(r"[,;]", s))
+                    split_more.extend(_SEMI_RE.split(s))
                 else:
                     split_more.append(s)
             raw = split_more
         elif ("," in text) or (";" in text):
-            raw = re.split(r"[,;]", text)
+            raw = _SEMI_RE.split(text)
         else:
-            raw = re.split(r"\s+", text)
+            raw = _WS_RE.split(text)
     return [x.strip() for x in raw if str(x).strip() != ""]
 
 
 def normalize_items(items, *, keep_only_digits=False, upper_case=False, strip_prefix_suffix=False):
-    out = []
-    for it in items:
-        s = str(it)
-        if strip_prefix_suffix:
-            s = re.sub(r"^\W+|\W+$", "", s)
-        if keep_only_digits:
-            s = re.sub(r"\D+", "", s)
-        if upper_case:
-            s = s.upper()
-        s = s.strip()
-        if s:
-            out.append(s)
-    return out
+    if not (keep_only_digits or strip_prefix_suffix):
+        # tanpa regex: cukup strip (+ upper)
+        stripped = (str(it).strip() for it in items)
+        return [s.upper() if upper_case else s for s in stripped if s]
+    # jalur regex: satu operasi .str per opsi untuk seluruh list (bukan regex per item).
+    # Input ASCII murni → string[pyarrow] (regex RE2 di C++); selain itu regex Python
+    # karena \W/\D RE2 hanya ASCII sedangkan re Python sadar Unicode.
+    # Jalur object memakai objek regex terkompilasi; jalur pyarrow butuh pola string
+    # (objek re.Pattern memaksa pandas kembali ke jalur object).
+    s = pd.Series(items, dtype=object).astype(str)
+    strip_re, digits_re = _STRIP_RE, _DIGITS_RE
+    if len(s) and pc.all(pc.string_is_ascii(pa.array(s, type=pa.string()))).as_py():
+        s = s.astype("string[pyarrow]")
+        strip_re, digits_re = _STRIP_RE.pattern, _DIGITS_RE.pattern
+    if strip_prefix_suffix:
+        s = s.str.replace(strip_re, "", regex=True)
+    if keep_only_digits:
+        s = s.str.replace(digits_re, "", regex=True)
+    if upper_case:
+        s = s.str.upper()
+    s = s.str.strip()
+    return s[s.str.len() > 0].tolist()
 
 
 def chunk_list(items, size):
@@ -417,19 +736,51 @@ def to_txt_bytes(lines):
     return buf.getvalue().encode("utf-8")
 
 
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV UTF-8 ditulis langsung ke buffer bytes (tanpa string perantara)."""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8", lineterminator="\n")
+    return buf.getvalue()
+
+
 def df_from_list(items, col_name="PO"):
     return pd.DataFrame({col_name: items})
 
 
-def make_zip_bytes(chunks, *, basename="chunk", as_csv=True, col_name="PO"):
+_ZIP_STORE_MAX_BYTES = 1024
+
+
+def make_zip_bytes(chunks, *, basename="chunk", as_csv=True, col_name="PO", compresslevel: int = 1):
+    """Zip berisi satu file per chunk. Deflate level 1 (daftar PO pendek: level 6
+    jauh lebih lambat dengan ukuran hampir sama); entry < 1KB disimpan tanpa kompresi."""
     mem = io.BytesIO()
-    with zipfile.ZipFile(mem, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+    with zipfile.ZipFile(mem, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zf:
         for idx, part in enumerate(chunks, start=1):
-            if as_csv:
-                df = df_from_list(part, col_name=col_name)
-                csv_bytes = df.to_csv(index=False).encode("utf-8")
-                zf.writestr(f"{basename}_{idx:02d}.csv", csv_bytes)
+            info = zipfile.ZipInfo(
+                f"{basename}_{idx:02d}.{'csv' if as_csv else 'txt'}", date_time=time.localtime()[:6]
+            )
+            info.external_attr = 0o600 << 16
+            # tiap baris minimal 1 byte → ukuran hanya perlu dihitung untuk chunk kecil
+            small = len(part) < _ZIP_STORE_MAX_BYTES
+            if small:
+                size = sum(len(str(x)) + 1 for x in part) + (len(col_name) + 1 if as_csv else 0)
+                small = size < _ZIP_STORE_MAX_BYTES
+            info.compress_type = zipfile.ZIP_STORED if small else zipfile.ZIP_DEFLATED
+            # ZipInfo eksplisit tidak mewarisi compresslevel ZipFile (tanpa ini → zlib level 6);
+            # atributnya compress_level sejak Python 3.13, _compresslevel sebelumnya
+            if hasattr(info, "compress_level"):
+                info.compress_level = compresslevel
             else:
-                zf.writestr(f"{basename}_{idx:02d}.txt", to_txt_bytes(part))
+                info._compresslevel = compresslevel
+            # ditulis streaming ke entry zip (encode UTF-8 langsung ke deflater),
+            # tanpa DataFrame / string CSV utuh per chunk
+            with zf.open(info, "w", force_zip64=True) as fh, \
+                    io.TextIOWrapper(fh, encoding="utf-8", newline="") as tw:
+                if as_csv:
+                    writer = csv.writer(tw, lineterminator="\n")
+                    writer.writerow([col_name])
+                    writer.writerows([x] for x in part)
+                else:
+                    tw.writelines(f"{ln}\n" for ln in part)
     mem.seek(0)
     return mem